@@ -15,8 +15,27 @@
 # A range of functions designed to search LAMMPS files for information.
 # These functions work for 'read_data' files and 'molecule' files
 ##############################################################################
+import io
 import re
-from LammpsTreatmentFuncs import clean_data
+import numpy as np
+from pathlib import Path
+from functools import lru_cache
+try:
+    from numba import njit
+except ImportError: # Numba is optional - fall back to running the graph walk as pure Python
+    def njit(*args, **kwargs):
+        def wrap(func):
+            return func
+        return wrap
+from LammpsTreatmentFuncs import clean_data, refine_data_np, format_comment, edge_atom_fingerprint_strings
+
+# Section dtypes and atomID column indices shared by the partial structure converters
+_SECTION_DTYPES = {'Atoms': np.float64, 'Bonds': np.int64, 'Angles': np.int64, 'Dihedrals': np.int64, 'Impropers': np.int64}
+_ATOM_IDS = 0
+_BOND_IDS = [2, 3]
+_ANGLE_IDS = [2, 3, 4]
+_DIHEDRAL_IDS = [2, 3, 4, 5]
+_IMPROPER_IDS = [2, 3, 4, 5]
 
 # Get data
 def get_data(sectionName, lines, sectionIndexList, useExcept = True):
@@ -38,6 +57,28 @@ def get_data(sectionName, lines, sectionIndexList, useExcept = True):
 
     return data
 
+def get_all_sections(lines, sectionIndexList, sectionDtypes):
+    '''
+    Parse several sections as 2D ndarrays in one sweep of the section
+    boundaries. sectionDtypes is a dict of section keyword to ndarray dtype.
+    Joining each section and handing it to numpy.loadtxt avoids creating a
+    Python str/list object per value, and the single sweep avoids rescanning
+    lines to re-find each keyword as repeated get_data calls do.
+    Sections not in the LAMMPS data come back as empty arrays.
+    '''
+    sectionArrays = {sectionName: np.empty((0, 0), dtype=dtype) for sectionName, dtype in sectionDtypes.items()}
+
+    for startIndex, endIndex in zip(sectionIndexList[:-1], sectionIndexList[1:]):
+        dtype = sectionDtypes.get(lines[startIndex])
+        if dtype is None:
+            continue
+
+        sectionText = '\n'.join(lines[startIndex+1:endIndex]) # +1 means sectionName doesn't get included
+        if sectionText != '':
+            sectionArrays[lines[startIndex]] = np.loadtxt(io.StringIO(sectionText), dtype=dtype, ndmin=2)
+
+    return sectionArrays
+
 def get_coeff(coeffName, settingsData):
     # Inputs pre-split data
     # Return all lines that include coeffName in the [0] index
@@ -87,6 +128,21 @@ def find_sections(lines):
 
     return sectionIndexList
 
+@lru_cache(maxsize=16)
+def load_cleaned_file(filePath):
+    '''
+    Read, tidy and section index a data or molecule file, cached on file path.
+    map_from_path loads each molecule file twice per reaction - once for the
+    element dict and once for the atom objects - so the cache skips the repeat
+    read and parse. Returns (rawText, tidiedLines, sectionIndexList); the
+    returned lists are shared between calls so callers must not mutate them.
+    '''
+    rawText = Path(filePath).read_text()
+    tidiedLines = clean_data(rawText)
+    sectionIndexList = find_sections(tidiedLines)
+
+    return rawText, tidiedLines, sectionIndexList
+
 # Search bond pair
 def pair_search(bond, bondAtom):
     '''
@@ -98,75 +154,144 @@ def pair_search(bond, bondAtom):
     elif bond[3] == bondAtom:
         return bond[2]
 
-# Loop through atomIDs, possible bonds and find valid bonds
-def search_loop(bonds, bondAtom):
-    nextBondAtomList = []
+def build_csr(bondArray, maxAtomID):
+    '''
+    Build a CSR adjacency representation (indptr, indices) of the bond graph.
+    Each bond contributes both directions; the ravel of paired columns keeps
+    neighbours of an atom in bond file order, matching a pair_search scan.
+    '''
+    srcAtoms = bondArray[:, 2:4].ravel()
+    dstAtoms = bondArray[:, [3, 2]].ravel()
 
-    for searchAtom in bondAtom:
-        for bond in bonds:
-            nextAtomID = pair_search(bond, searchAtom)
-            if nextAtomID is not None:
-                nextBondAtomList.append(nextAtomID)
-    
-    return nextBondAtomList
-        
-def find_partial_structure(bondingAtoms, originalBonds, deleteAtoms, bondDistance=3):
+    indices = dstAtoms[np.argsort(srcAtoms, kind='stable')]
+
+    indptr = np.zeros(maxAtomID + 2, dtype=np.int64)
+    np.cumsum(np.bincount(srcAtoms, minlength=maxAtomID + 1), out=indptr[1:])
+
+    return indptr, indices
+
+@njit(cache=True)
+def _bfs_partial(indptr, indices, bondingAtoms, initialValidAtoms, bondDistance):
+    # Walk the bond graph from each bonding atom out to bondDistance bonds
+    numAtoms = indptr.shape[0] - 1
+    validAtoms = np.zeros(numAtoms, dtype=np.bool_)
+    for atom in initialValidAtoms:
+        validAtoms[atom] = True
+
+    edgeAtoms = np.empty(16, dtype=np.int64)
+    edgeCount = 0
+
+    for bondAtom in bondingAtoms:
+        frontier = np.empty(1, dtype=np.int64)
+        frontier[0] = bondAtom
+
+        for distance in range(1, bondDistance + 1):
+            # Gather all neighbours of the current frontier
+            frontierBonds = 0
+            for atom in frontier:
+                frontierBonds += indptr[atom + 1] - indptr[atom]
+
+            nextFrontier = np.empty(frontierBonds, dtype=np.int64)
+            count = 0
+            for atom in frontier:
+                for neighbourIndex in range(indptr[atom], indptr[atom + 1]):
+                    nextFrontier[count] = indices[neighbourIndex]
+                    count += 1
+
+            if distance == 1: # First pass - Stop search from finding other bonding atom if they are bound together
+                keepCount = 0
+                for atom in nextFrontier:
+                    isBondingAtom = False
+                    for otherBondAtom in bondingAtoms:
+                        if atom == otherBondAtom:
+                            isBondingAtom = True
+                            break
+                    if not isBondingAtom:
+                        nextFrontier[keepCount] = atom
+                        keepCount += 1
+                nextFrontier = nextFrontier[:keepCount]
+
+            if distance < bondDistance: # Before bond distance is reached
+                for atom in nextFrontier:
+                    validAtoms[atom] = True
+
+            else: # Once bond distance is reached
+                # Atoms not yet marked valid are possible edge atoms of the partial structure
+                possibleEdgeAtoms = np.empty(nextFrontier.shape[0], dtype=np.int64)
+                possibleCount = 0
+                for atom in nextFrontier:
+                    if not validAtoms[atom]:
+                        possibleEdgeAtoms[possibleCount] = atom
+                        possibleCount += 1
+
+                # Mark valid - has to be after possibleEdgeAtoms
+                for atom in nextFrontier:
+                    validAtoms[atom] = True
+
+                # Edge atoms are possible edge atoms with further bonds - all atoms will have at least one bond
+                for index in range(possibleCount):
+                    atom = possibleEdgeAtoms[index]
+                    if indptr[atom + 1] - indptr[atom] > 1:
+                        if edgeCount == edgeAtoms.shape[0]: # Grow output array when full
+                            grownEdgeAtoms = np.empty(edgeAtoms.shape[0] * 2, dtype=np.int64)
+                            grownEdgeAtoms[:edgeCount] = edgeAtoms
+                            edgeAtoms = grownEdgeAtoms
+                        edgeAtoms[edgeCount] = atom
+                        edgeCount += 1
+
+            frontier = nextFrontier
+
+    return validAtoms, edgeAtoms[:edgeCount]
+
+def edge_atom_fingerprint_ids(edgeAtomArray, indptr, indices, validAtoms):
+    '''
+    Collect neighbour atomIDs outside the partial structure for each edge atom.
+    Returned as parallel arrays (fingerprintIndptr, fingerprintAtomIDs) so the
+    later element translation is a gather over one contiguous array.
+    '''
+    neighbourCounts = indptr[edgeAtomArray + 1] - indptr[edgeAtomArray]
+    fingerprintAtomIDs = np.empty(int(neighbourCounts.sum()), dtype=np.int64)
+    fingerprintIndptr = np.zeros(edgeAtomArray.shape[0] + 1, dtype=np.int64)
+
+    count = 0
+    for index, atom in enumerate(edgeAtomArray):
+        for neighbour in indices[indptr[atom]:indptr[atom + 1]]:
+            if not validAtoms[neighbour]:
+                fingerprintAtomIDs[count] = neighbour
+                count += 1
+        fingerprintIndptr[index + 1] = count
+
+    return fingerprintIndptr, fingerprintAtomIDs[:count]
+
+def find_partial_structure(bondingAtoms, originalBondList, deleteAtoms, bondDistance=3):
     # Find bonds within a specified distance of the bonding atoms
-    
+    bondArray = np.asarray(originalBondList, dtype=np.int64)
+    bondingAtomArray = np.asarray(bondingAtoms, dtype=np.int64)
+
     # Add delete atoms to valid atoms if present
-    initialValidAtoms = bondingAtoms.copy()
     if deleteAtoms is not None:
-        initialValidAtoms.extend(deleteAtoms) # Allows partial structure tools to work when byproducts are formed and deleted
+        deleteAtomArray = np.asarray(deleteAtoms, dtype=np.int64)
+        initialValidAtoms = np.concatenate((bondingAtomArray, deleteAtomArray)) # Allows partial structure tools to work when byproducts are formed and deleted
+    else:
+        initialValidAtoms = bondingAtomArray
 
-    validAtomSet = set(initialValidAtoms)
-    edgeAtomList = []
+    maxAtomID = max(int(bondArray[:, 2:4].max()), int(initialValidAtoms.max()))
+    indptr, indices = build_csr(bondArray, maxAtomID)
 
-    for bondAtom in bondingAtoms:
+    validAtoms, edgeAtomArray = _bfs_partial(indptr, indices, bondingAtomArray, initialValidAtoms, bondDistance)
 
-        # Make bondAtom a list
-        newBondAtomList = [bondAtom]
-        
-        i = 1
-        while i <= bondDistance:
-            newBondAtomList = search_loop(originalBonds, newBondAtomList)
-            if i == 1: # First pass - Stop search from finding other bonding atom if they are bound together
-                newBondAtomList = [val for val in newBondAtomList if val not in bondingAtoms]
+    # Wrap results back as string sets and lists for compatibility with callers
+    validAtomSet = {str(atom) for atom in np.nonzero(validAtoms)[0]}
+    edgeAtomList = [str(atom) for atom in edgeAtomArray]
 
-            if i < bondDistance: # Before bond distance is reached
-                # Add list as individual elements 
-                for atom in newBondAtomList:
-                    validAtomSet.add(atom)
+    # Get edge atom neighbours that sit outside the partial structure
+    fingerprintIndptr, fingerprintAtomIDs = edge_atom_fingerprint_ids(edgeAtomArray, indptr, indices, validAtoms)
 
-            else: # Once bond distance is reached
-                # Determine which of the last obtained atom IDs have further bonds               
-                # newBondAtomList at this point contains edge atoms of an order, and other atoms found before
-                possibleEdgeAtoms = [val for val in newBondAtomList if val not in validAtomSet]
-
-                # Add list as individual elements - has to be after possibleEdgeAtoms
-                for atom in newBondAtomList:
-                    validAtomSet.add(atom)
-
-                # Run another loop to determine if possibleEdgeAtoms have other bonds
-                for searchAtom in possibleEdgeAtoms:
-                    bondCount = 0
-                    for bond in originalBonds:
-                        nextAtomID = pair_search(bond, searchAtom)
-                        if nextAtomID is not None:
-                            bondCount += 1
-                    if bondCount > 1: # All atoms will have at least one bond
-                        edgeAtomList.append(searchAtom)
-            
-            # Increment iterator
-            i += 1
-
-    # Get edge atom neighbours
-    edgeAtomFingerprintDict = get_neighbours(edgeAtomList, originalBonds)
-    
-    # Filter out validAtomIDs that are within the partial structure
+    # Keyed dict view of the fingerprint arrays for compatibility with callers
     filteredFingerprintDict = {}
-    for key, atomList in edgeAtomFingerprintDict.items():
-        cutList = [atom for atom in atomList if atom not in validAtomSet]
-        filteredFingerprintDict[key] = cutList
+    for index, atom in enumerate(edgeAtomArray):
+        cutAtoms = fingerprintAtomIDs[fingerprintIndptr[index]:fingerprintIndptr[index + 1]]
+        filteredFingerprintDict[str(atom)] = [str(neighbour) for neighbour in cutAtoms]
 
     return validAtomSet, edgeAtomList, filteredFingerprintDict
 
@@ -226,14 +351,84 @@ def get_additional_neighbours(neighboursDict, searchAtomID, searchNeighbours, un
 
     return list(totalNeighbourSet)
 
-def element_atomID_dict(fileName, elementsByType):
-    # Load molecule file
-    with open(fileName, 'r') as f:
-        lines = f.readlines()
+def build_partial_structure(filePath, elementsByType, bondingAtoms, deleteAtoms, bondDistance=3):
+    '''
+    Shared load, search and refine pipeline for the partial structure
+    converters. Reads and tidies the data file, parses the bonded sections as
+    ndarrays, finds the partial structure around the bonding atoms and
+    renumbers each section with refine_data_np.
+    Returns a dict with the tidied lines, section index list, refined section
+    arrays, the old to new atomID lookup array, the renumbered edge atom list
+    and the bonding, edge and fingerprint header comments.
+    '''
+    # Read, tidy and section index the file through the cached loader
+    _, tidiedLines, sectionIndexList = load_cleaned_file(filePath)
+
+    # Parse section data into ndarrays in one pass - atoms kept as float for charge and coord columns
+    sectionArrays = get_all_sections(tidiedLines, sectionIndexList, _SECTION_DTYPES)
+    atomArray = sectionArrays['Atoms']
+    originalBondArray = sectionArrays['Bonds']
+
+    validAtomSet, edgeAtomList, edgeAtomFingerprintDict = find_partial_structure(bondingAtoms, originalBondArray, deleteAtoms, bondDistance=bondDistance)
+    validAtomArray = np.array(sorted(int(atom) for atom in validAtomSet), dtype=np.int64)
+
+    # Get atoms data and the old to new atomID lookup array, then refine the bonded sections
+    atoms, renumberLUT = refine_data_np(atomArray, _ATOM_IDS, validAtomArray)
+    bonds = refine_data_np(originalBondArray, _BOND_IDS, validAtomArray, renumberLUT)
+    angles = refine_data_np(sectionArrays['Angles'], _ANGLE_IDS, validAtomArray, renumberLUT)
+    dihedrals = refine_data_np(sectionArrays['Dihedrals'], _DIHEDRAL_IDS, validAtomArray, renumberLUT)
+    impropers = refine_data_np(sectionArrays['Impropers'], _IMPROPER_IDS, validAtomArray, renumberLUT)
+
+    # Format edge atom fingerprints - element lookup built from the parsed atom data, no file reread
+    elementLUT = element_lut(atomArray, elementsByType)
+    edgeElementFingerprintDict = edge_atom_fingerprint_strings(edgeAtomFingerprintDict, elementLUT)
+
+    # Convert dictionary to list of fingerprint strings - order is the same as renumbered edge atoms
+    edgeElementFingerprintList = [atomString for atomString in edgeElementFingerprintDict.values()]
+
+    # Renumber bonding and edge atom comments with new atomIDs - a gather from the lookup array
+    renumberedBondingAtoms = renumberLUT[np.asarray(bondingAtoms, dtype=np.int64)]
+    renumberedEdgeAtoms = renumberLUT[np.asarray(edgeAtomList, dtype=np.int64)]
+
+    # Add bond and edge atoms as comment in header
+    bondAtoms = format_comment(renumberedBondingAtoms, '# Bonding_Atoms ')
+    edgeAtoms = format_comment(renumberedEdgeAtoms, '# Edge_Atoms ')
+    edgeFingerprints = format_comment(edgeElementFingerprintList, '# Edge_Atom_Fingerprints ')
+    commentString = [bondAtoms, edgeAtoms, edgeFingerprints]
+
+    return {
+        'tidiedLines': tidiedLines,
+        'sectionIndexList': sectionIndexList,
+        'atoms': atoms,
+        'bonds': bonds,
+        'angles': angles,
+        'dihedrals': dihedrals,
+        'impropers': impropers,
+        'renumberLUT': renumberLUT,
+        'commentString': commentString,
+    }
+
+def element_lut(atomArray, elementsByType):
+    '''
+    Build an element symbol lookup array indexed by integer atomID.
+    Works from the already parsed Atoms ndarray so the file is not reread,
+    assumes atom type full with the type in the third column. Fingerprint
+    code gathers element symbols with elementLUT[atomIDs].
+    '''
+    atomIDs = atomArray[:, 0].astype(np.int64)
+    atomTypes = atomArray[:, 2].astype(np.int64)
+
+    # Ensure elementsByType is uppercase
+    elementsArray = np.array([val.upper() for val in elementsByType])
+
+    elementLUT = np.zeros(atomIDs.max() + 1, dtype=elementsArray.dtype)
+    elementLUT[atomIDs] = elementsArray[atomTypes - 1]
 
-    # Clean data and get charge
-    data = clean_data(lines)
-    sections = find_sections(data)
+    return elementLUT
+
+def element_atomID_dict(fileName, elementsByType):
+    # Read molecule file through the cached loader and get charge
+    _, data, sections = load_cleaned_file(fileName)
     try: # Try is for getting types from molecule file types
         types = get_data('Types', data, sections, useExcept=False)
     except ValueError: # Exception gets types from standard lammps file type
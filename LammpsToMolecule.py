@@ -39,20 +39,17 @@
 ##############################################################################
 
 import os
+from pathlib import Path
+from itertools import chain
 from LammpsTreatmentFuncs import clean_data, add_section_keyword, save_text_file, format_comment
 from LammpsSearchFuncs import get_data, find_sections
 
 def lammps_to_molecule(directory, fileName, saveName, bondingAtoms: list, deleteAtoms=None):
-    # Go to file directory
-    os.chdir(directory)
+    # Build file path - no chdir side effect so callers can run in parallel
+    filePath = os.path.join(directory, fileName)
 
-    # Load file into python as a list of lists
-    with open(fileName, 'r') as f:
-        lines = f.readlines()
-    
-
-    # Tidy input
-    tidiedLines = clean_data(lines)
+    # Read file as one block of text and tidy input
+    tidiedLines = clean_data(Path(filePath).read_text())
     
     # Build sectionIndexList
     sectionIndexList = find_sections(tidiedLines)
@@ -98,13 +95,10 @@ def lammps_to_molecule(directory, fileName, saveName, bondingAtoms: list, delete
         deleteAtomComment = format_comment(deleteAtoms, '# Delete_Atoms')
         commentString.extend([deleteAtomComment])
 
-    # Combine to one long output list
-    outputList = []
+    # Combine to one long output list in a single flattening pass
     totalList = [commentString, header, types, charges, coords, bonds, angles, dihedrals, impropers]
-    
-    for keyword in totalList:
-        outputList.extend(keyword)
-        
+    outputList = list(chain.from_iterable(totalList))
+
     # Output as text file
-    save_text_file(saveName + 'molecule.data', outputList)
+    save_text_file(os.path.join(directory, saveName + 'molecule.data'), outputList)
 
@@ -39,105 +39,56 @@
 ##############################################################################
 
 import os
-from LammpsTreatmentFuncs import clean_data, add_section_keyword, save_text_file, refine_data, format_comment, edge_atom_fingerprint_strings
-from LammpsSearchFuncs import get_data, find_partial_structure, find_sections, element_atomID_dict
+import numpy as np
+from LammpsTreatmentFuncs import save_section_file, format_comment
+from LammpsSearchFuncs import build_partial_structure
 
 def lammps_to_molecule_partial(directory, fileName, saveName, elementsByType, bondingAtoms: list, deleteAtoms=None):
     # Check that bonding atoms have been specified
     assert len(bondingAtoms) > 0, 'No bonding atoms have been specified'
 
-    # Go to file directory
-    os.chdir(directory)
-
-    # Load file into python as a list of lists
-    with open(fileName, 'r') as f:
-        lines = f.readlines()
-    
-    # Tidy input
-    tidiedLines = clean_data(lines)
-    
-    # Build sectionIndexList
-    sectionIndexList = find_sections(tidiedLines)
-
-    # Get original bonds data
-    originalBonds = get_data('Bonds', tidiedLines, sectionIndexList)
-    
-    validAtomSet, edgeAtomList, edgeAtomFingerprintDict = find_partial_structure(bondingAtoms, originalBonds, deleteAtoms, bondDistance=3)
-
-    # Get atoms data
-    atoms = get_data('Atoms', tidiedLines, sectionIndexList)
-    atoms, renumberedAtomIDDict = refine_data(atoms, 0, validAtomSet)
-
-    # Get new bonds data
-    bonds = refine_data(originalBonds, [2, 3], validAtomSet, renumberedAtomIDDict)
-    bonds = add_section_keyword('Bonds', bonds)
-    
-    # Get angles data
-    angles = get_data('Angles', tidiedLines, sectionIndexList)
-    angles = refine_data(angles, [2, 3, 4], validAtomSet, renumberedAtomIDDict)
-    angles = add_section_keyword('Angles', angles)
-
-    # Get dihedrals
-    dihedrals = get_data('Dihedrals', tidiedLines, sectionIndexList)
-    dihedrals = refine_data(dihedrals, [2, 3, 4, 5], validAtomSet, renumberedAtomIDDict)
-    dihedrals = add_section_keyword('Dihedrals', dihedrals)
-
-    # Get impropers
-    impropers = get_data('Impropers', tidiedLines, sectionIndexList)
-    impropers = refine_data(impropers, [2, 3, 4, 5], validAtomSet, renumberedAtomIDDict)
-    impropers = add_section_keyword('Impropers', impropers)
-
-    # Rearrange atom data to get types, charges, coords - assume atom type full very important
-    types = [[atom[0], atom[2]] for atom in atoms]
-    types = add_section_keyword('Types', types)
-
-    charges = [[atom[0], atom[3]] for atom in atoms]
-    charges = add_section_keyword('Charges', charges)
-
-    coords = [[atom[0], atom[4], atom[5], atom[6]] for atom in atoms]
-    coords = add_section_keyword('Coords', coords)
+    # Build file path - no chdir side effect so callers can run in parallel
+    filePath = os.path.join(directory, fileName)
+
+    # Shared load, search and refine pipeline with LammpsToLammpsPartial
+    partialStructure = build_partial_structure(filePath, elementsByType, bondingAtoms, deleteAtoms)
+    tidiedLines = partialStructure['tidiedLines']
+    atoms = partialStructure['atoms']
+    bonds = partialStructure['bonds']
+    angles = partialStructure['angles']
+    dihedrals = partialStructure['dihedrals']
+    impropers = partialStructure['impropers']
+    renumberLUT = partialStructure['renumberLUT']
+    commentString = partialStructure['commentString']
+
+    # Rearrange atom data to get types, charges, coords as column views - assume atom type full very important
+    types = atoms[:, [0, 2]]
+    charges = atoms[:, [0, 3]]
+    coords = atoms[:, [0, 4, 5, 6]]
 
     # Get and change header values
     header = tidiedLines[1:6]
     header = [val.split() for val in header]
     # Update numbers with new lengths of data
     for index, data in enumerate([types, bonds, angles, dihedrals, impropers]):
-        if len(data) > 0: # This corrects for the added section keyword lines
-            header[index][0] = str(len(data) - 3)
-        else:
-            header[index][0] = str(0)
-    header.insert(0, ['\n'])
-
-    # Format edge atom fingerprints
-    elementAtomIDDict = element_atomID_dict(fileName, elementsByType)
-    
-    edgeElementFingerprintDict = edge_atom_fingerprint_strings(edgeAtomFingerprintDict, elementAtomIDDict)
-
-    # Convert dictionary to list of lists of fingerprint strings - order is the same as renumbered edge atoms
-    edgeElementFingerprintList = [atomString for atomString in edgeElementFingerprintDict.values()]
+        header[index][0] = str(data.shape[0])
 
-    # Renumber bonding and edge atom comments with new atomIDs
-    renumberedBondingAtoms = [renumberedAtomIDDict[ba] for ba in bondingAtoms]
-    renumberedEdgeAtoms = [renumberedAtomIDDict[ea] for ea in edgeAtomList]
-    
-    # Add bond and edge atoms as comment in header
-    bondAtoms = format_comment(renumberedBondingAtoms, '# Bonding_Atoms ')
-    edgeAtoms = format_comment(renumberedEdgeAtoms, '# Edge_Atoms ')
-    edgeFingerprints = format_comment(edgeElementFingerprintList, '# Edge_Atom_Fingerprints ')
-    commentString = [bondAtoms, edgeAtoms, edgeFingerprints]
-    
     # Handle deleteAtoms if the users has specified them
     if deleteAtoms is not None:
-        renumberedDeleteAtoms = [renumberedAtomIDDict[da] for da in deleteAtoms]
+        renumberedDeleteAtoms = renumberLUT[np.asarray(deleteAtoms, dtype=np.int64)]
         deleteAtomComment = format_comment(renumberedDeleteAtoms, '# Delete_Atoms')
         commentString.extend([deleteAtomComment])
 
-    # Combine to one long output list
-    outputList = []
-    totalList = [commentString, header, types, charges, coords, bonds, angles, dihedrals, impropers]
-    
-    for keyword in totalList: # Collapses the list of list of lists into a list of lists...
-        outputList.extend(keyword)
-        
-    # Output as text file
-    save_text_file(saveName + 'molecule.data', outputList)
+    # Combine comments and header into the preformatted top lines
+    topLines = [comment[0] for comment in commentString] + [''] + [' '.join(row) for row in header]
+
+    # Output as text file, streaming each section through np.savetxt
+    save_section_file(os.path.join(directory, saveName + 'molecule.data'), topLines, [
+        ('Types', types, '%d'),
+        ('Charges', charges, ['%d', '%s']),
+        ('Coords', coords, ['%d', '%s', '%s', '%s']),
+        ('Bonds', bonds, '%d'),
+        ('Angles', angles, '%d'),
+        ('Dihedrals', dihedrals, '%d'),
+        ('Impropers', impropers, '%d'),
+    ])
@@ -18,29 +18,29 @@
 ##############################################################################
 
 import re # For clean_data, clean_settings
+import numpy as np # For refine_data_np
 from collections import Counter # For refine_data
 from operator import itemgetter # For refine_data
 from natsort import natsorted # For refine_data
 
+# Compiled once at import - [^\S\n] is whitespace excluding newlines, so both
+# patterns stay within a line when substituting over the whole file text
+# Negative lookbehind means label comments in masses are kept e.g # C_3
+_COMMENT_RE = re.compile(r'(?<!\d[^\S\n][^\S\n])#.*')
+# 5 spaces moltemplate/LAMMPS puts in front of header file
+_HEADER_INDENT_RE = re.compile(r'[^\S\n]{5}')
+
 # Function maybe moved to general function file later
 def clean_data(lines):
-    # Remove blank lines 
-    lines = [line for line in lines if line != '\n']
-
-    # Remove comments - negative lookbehind means label comments in masses are kept e.g # C_3
-    lines = [re.sub(r'(?<!\d\s\s)#(.*)', '' ,line) for line in lines]
-
-    # Remove 5 spaces moltemplate/LAMMPS puts in front of header file
-    lines = [re.sub(r'\s{5}', '' ,line) for line in lines]
-
-    # Remove newline terminators
-    lines = [re.sub(r'\n', '', line) for line in lines]
+    # Accept raw file text or a list of lines
+    text = lines if isinstance(lines, str) else ''.join(lines)
 
-    # Remove empty strings in list caused by comments being removed
-    lines = [line for line in lines if line != '']
+    # Remove comments and header indents in two passes over the full text
+    text = _COMMENT_RE.sub('', text)
+    text = _HEADER_INDENT_RE.sub('', text)
 
-    # Remove trailing whitespace
-    lines = [re.sub(r'\s+$', '', line) for line in lines]
+    # Split lines, dropping blank lines and trailing whitespace
+    lines = [line.rstrip() for line in text.splitlines() if line != '']
 
     return lines
 
@@ -107,10 +107,52 @@ def refine_data(data, searchIndex: list, IDset, newAtomIDs=None):
                 row[index] = newAtomIDs[row[index]]
         return validData
 
+def refine_data_np(data, searchIndex, validAtomArray, renumberLUT=None):
+    '''
+    Vectorised counterpart to refine_data for ndarray section data.
+    Rows are kept when every searchIndex column holds a valid atomID, checked
+    with a boolean membership array rather than per-row Python scans.
+    New IDs run 1:len(data), required for LAMMPS; when no lookup array is
+    given, the old to new ID mapping is returned as a dense int64 array so
+    later renumbering is a single gather.
+    '''
+    # Convenience to convert int values to list
+    if type(searchIndex) is not list:
+        searchIndex = [searchIndex]
+
+    # Empty array means no section in file, pass it through unchanged
+    if data.size == 0:
+        return data
+
+    # Keep rows where all searched columns hold valid atomIDs
+    idData = data[:, searchIndex].astype(np.int64)
+    maxAtomID = max(int(idData.max()), int(validAtomArray.max()))
+    validMask = np.zeros(maxAtomID + 1, dtype=bool)
+    validMask[validAtomArray] = True
+    validData = data[validMask[idData].all(axis=1)]
+
+    # Re-sort validData by ID, ndarray equivalent of the natsort on string rows
+    validData = validData[np.argsort(validData[:, 0].astype(np.int64), kind='stable')]
+    newIDs = np.arange(1, validData.shape[0] + 1, dtype=np.int64)
+
+    # Determine new atomIDs from 1:len(data), required for LAMMPS
+    if renumberLUT is None:
+        renumberLUT = np.zeros(maxAtomID + 1, dtype=np.int64)
+        renumberLUT[validData[:, 0].astype(np.int64)] = newIDs
+        validData[:, 0] = newIDs
+
+        return validData, renumberLUT
+
+    # If lookup array provided then use it to update the atom IDs from old to new
+    validData[:, searchIndex] = renumberLUT[validData[:, searchIndex].astype(np.int64)]
+    validData[:, 0] = newIDs
+
+    return validData
+
 def add_section_keyword(sectionName, data):
     # Don't add keyword if list is empty - empty list means no section in file
     if len(data) == 0:
-        return data
+        return []
 
     # Add keyword name to start of list
     data.insert(0, '\n')
@@ -129,26 +171,49 @@ def save_text_file(fileName, dataSource):
             else:
                 f.write(line)
 
+def save_section_file(fileName, topLines, sections):
+    '''
+    Save comment and header lines followed by ndarray sections.
+    topLines is a list of preformatted lines, an empty string gives a blank
+    line. sections is a list of (sectionName, data, fmt) tuples; ndarray data
+    is bulk formatted with np.savetxt so row formatting stays at C level,
+    string row lists are written directly. Empty sections are skipped.
+    '''
+    with open(fileName, 'w', buffering=1<<20) as f:
+        for line in topLines:
+            f.write(line + '\n')
+
+        for sectionName, data, fmt in sections:
+            if len(data) == 0: # Empty data means no section in file
+                continue
+
+            f.write('\n' + sectionName + '\n\n')
+            if isinstance(data, np.ndarray):
+                np.savetxt(f, data, fmt=fmt)
+            else:
+                for row in data:
+                    f.write(' '.join(row) + '\n')
+
 # Create comment string with bond atoms and edge atoms
 def format_comment(IDlist, comment):
-    atomList = list(IDlist)
-    atomList.insert(0, comment)
-    atomString = [' '.join(atomList)] # Has to be list of lists to pass through later code
+    # Bulk convert ndarray IDs to strings, otherwise stringify per element
+    if isinstance(IDlist, np.ndarray):
+        body = ' '.join(IDlist.astype(str))
+    else:
+        body = ' '.join(map(str, IDlist))
+    atomString = [comment + ' ' + body] # Has to be list of lists to pass through later code
 
     return atomString
 
 # Convert edge atom fingerprints from atom IDs to element strings
-def edge_atom_fingerprint_strings(edgeAtomFingerprintDict, elementsByTypeDict):
+def edge_atom_fingerprint_strings(edgeAtomFingerprintDict, elementLookup):
     edgeElementFingerprintDict = {}
     for key, atomList in edgeAtomFingerprintDict.items():
-        cutList = [elementsByTypeDict[atom] for atom in atomList]
-
-        # Sort list alphabetically
-        cutList = natsorted(cutList)
-
-        # Join list to single string
-        cutList = ''.join(cutList)
-
-        edgeElementFingerprintDict[key] = cutList
+        # Sort alphabetically and join straight to a string, no intermediate list
+        # Gather from an ndarray LUT indexed by int atomID, otherwise use dict lookups
+        if isinstance(elementLookup, np.ndarray):
+            edgeElementFingerprintDict[key] = ''.join(sorted(elementLookup[np.asarray(atomList, dtype=np.int64)]))
+        else:
+            edgeElementFingerprintDict[key] = ''.join(sorted(elementLookup[atom] for atom in atomList))
 
     return edgeElementFingerprintDict
@@ -44,8 +44,9 @@
 ##############################################################################
 
 import os
+from pathlib import Path
 from natsort import natsorted
-from itertools import combinations_with_replacement
+from itertools import chain, combinations_with_replacement
 from LammpsTreatmentFuncs import clean_data, clean_settings, add_section_keyword, save_text_file
 from LammpsSearchFuncs import get_data, get_coeff, find_sections
 
@@ -143,17 +144,12 @@ def file_unifier(directory, coeffsFile, dataList):
             for index, sectionType in enumerate(typeList):
                 self.header[6+index][0] = sectionType
 
-    # Go to file directory
-    os.chdir(directory)
-
     # Load files from dataList, tidy and initialise class object
+    # Paths built explicitly - no chdir side effect so callers can run in parallel
     lammpsData = []
     for dataFile in dataList:
-        with open(dataFile, 'r') as f:
-            data = f.readlines()
-
-        # Tidy data
-        data = clean_data(data)
+        # Read file as one block of text and tidy data
+        data = clean_data(Path(os.path.join(directory, dataFile)).read_text())
 
         # Initialise data class
         data = Data(data)
@@ -206,17 +202,16 @@ def file_unifier(directory, coeffsFile, dataList):
         # Combine all different data sources into one list
         combinedData = [data.header, data.masses, data.atoms, data.bonds, data.angles, data.dihedrals, data.impropers]
         # Flatten list of lists by one
-        combinedData = [val for sublist in combinedData for val in sublist]
+        combinedData = list(chain.from_iterable(combinedData))
 
         # Save to text file
-        save_text_file('cleaned' + dataList[index], combinedData)
+        save_text_file(os.path.join(directory, 'cleaned' + dataList[index]), combinedData)
     
     ####SETTINGS####
 
-    # Load dataFile into python as a list of lists
-    with open(coeffsFile, 'r') as f:
-        settings = f.readlines()
-    
+    # Read dataFile as one block of text and split into lines
+    settings = Path(os.path.join(directory, coeffsFile)).read_text().splitlines()
+
     # Tidy settings and split
     settings = clean_settings(settings)
     settings = [line.split() for line in settings]
@@ -267,7 +262,7 @@ def file_unifier(directory, coeffsFile, dataList):
     # Combine all the coeff sources
     combinedCoeffs = [validPairCoeff, validBondCoeff, validAngleCoeff, validDihedralCoeff, validImproperCoeff]
     # Flatten list of lists by one
-    combinedCoeffs = [val for sublist in combinedCoeffs for val in sublist]
+    combinedCoeffs = list(chain.from_iterable(combinedCoeffs))
 
     # Save coeff file
-    save_text_file('cleaned' + coeffsFile, combinedCoeffs)
+    save_text_file(os.path.join(directory, 'cleaned' + coeffsFile), combinedCoeffs)
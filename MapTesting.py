@@ -18,45 +18,50 @@
 # designed to tax different parts of the path search system to check functionality
 ##############################################################################
 
-import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from PathSearch import map_from_path
 
 class Reaction:
     def __init__(self, directory, preFileName, postFileName, elementByType):
-        startDir = os.getcwd() # Save primary main directory path to return to it after mapping
         self.mappedIDList = map_from_path(directory, preFileName, postFileName, elementByType, True)
-        os.chdir(startDir)
 
     def test_report(self, correctPostAtomIDs, reactionName):
-        print(f'Reaction: {reactionName}')
-        # Print test report
+        reportLines = [f'Reaction: {reactionName}']
+        # Build test report
         for mappedPair in self.mappedIDList:
-            print(f'Atom {mappedPair[0]} is mapped to atom {mappedPair[1]}')
+            reportLines.append(f'Atom {mappedPair[0]} is mapped to atom {mappedPair[1]}')
+
 
-        
         totalAtoms = len(correctPostAtomIDs)
         correctAtoms = 0
         incorrectPreAtomsList = []
+        # Convert correct ID lists to sets once for constant time membership tests
+        correctPostAtomIDSets = {key: set(val) for key, val in correctPostAtomIDs.items()}
         for atom in self.mappedIDList:
-            if atom[1] in correctPostAtomIDs[atom[0]]:
+            if atom[1] in correctPostAtomIDSets[atom[0]]:
                 correctAtoms += 1
             else:
                 incorrectPreAtomsList.append(atom[0])
 
         mappedPostAtomsList = [val[1] for val in self.mappedIDList]
-        repeatedPostIDs = [val for val in mappedPostAtomsList if mappedPostAtomsList.count(val) > 1]
+        mappedPostAtomsCount = Counter(mappedPostAtomsList)
+        repeatedPostIDs = [val for val in mappedPostAtomsList if mappedPostAtomsCount[val] > 1]
+
+        reportLines.append(f'Total atoms: {totalAtoms}. Correct atoms: {correctAtoms}. Accuracy: {round(correctAtoms / totalAtoms * 100, 1)}%')
+        reportLines.append(f'Incorrectly assigned premolecule atomIDs: {incorrectPreAtomsList}, Count {len(incorrectPreAtomsList)}')
+        reportLines.append(f'Repeated Atoms: {repeatedPostIDs}, Count: {len(repeatedPostIDs)}\n\n')
+
+        return '\n'.join(reportLines)
+
+def run_case(case):
+    # Run one reaction and return its report - top level so process pools can pickle it
+    reactionName, directory, preFileName, postFileName, elementByType, correctPostAtomIDs = case
+    reaction = Reaction(directory, preFileName, postFileName, elementByType)
 
-        print(f'Total atoms: {totalAtoms}. Correct atoms: {correctAtoms}. Accuracy: {round(correctAtoms / totalAtoms * 100, 1)}%')
-        print(f'Incorrectly assigned premolecule atomIDs: {incorrectPreAtomsList}, Count {len(incorrectPreAtomsList)}')
-        print(f'Repeated Atoms: {repeatedPostIDs}, Count: {len(repeatedPostIDs)}\n\n')
+    return reaction.test_report(correctPostAtomIDs, reactionName)
 
 # DGEBA-DETDA
-dgebaDetda = Reaction(
-    'Test_Cases/Map_Tests/DGEBA_DETDA/', 
-    'pre-molecule.data', 
-    'post-molecule.data', 
-    ['H', 'H', 'C', 'C', 'N', 'O', 'O', 'O']
-)
 correctDgebaDetda = {
     '1': ['1'],
     '2': ['2'],
@@ -79,15 +84,8 @@ correctDgebaDetda = {
     '19': ['20', '19'],
     '20': ['17']
 }
-dgebaDetda.test_report(correctDgebaDetda, 'DGEBA-DETDA')
 
 # Ethyl Ethanoate
-ethylEthanoate = Reaction(
-    'Test_Cases/Map_Tests/Ethyl_Ethanoate', 
-    'pre-molecule.data', 
-    'post-molecule.data', 
-    ['H', 'H', 'C', 'C', 'O', 'O', 'O', 'O']
-)
 correctEthylEthanoate = {
     '1': ['9'],
     '2': ['8'],
@@ -102,21 +100,14 @@ correctEthylEthanoate = {
     '12': ['3', '4', '5'],
     '13': ['3', '4', '5'],
     '14': ['3', '4', '5'],
-    '17': ['6'],   
+    '17': ['6'],
     # Water molecule atoms
     '9': ['17', '16'],
     '16': ['17', '16'],
     '15': ['15']
 }
-ethylEthanoate.test_report(correctEthylEthanoate, 'Ethyl Ethanoate')
-
-# Methane to Ethane 
-ethane = Reaction(
-    'Test_Cases/Map_Tests/Methane_Ethane', 
-    'pre-molecule.data', 
-    'post-molecule.data', 
-    ['H', 'C']
-)
+
+# Methane to Ethane
 correctEthane = {
     '1': ['1'],
     '2': ['6', '7', '8'],
@@ -127,17 +118,10 @@ correctEthane = {
     '7': ['3', '4', '5'],
     '8': ['3', '4', '5'],
     '9': ['3', '4', '5'],
-    '10': ['9', '10'], 
+    '10': ['9', '10'],
 }
-ethane.test_report(correctEthane, 'Methane to Ethane')
 
 # LAMMPS Example - Nylon 6,6 taken from 'nylon,6-6_melt' example
-nylon = Reaction(
-    'Test_Cases/Map_Tests/Lammps_Nylon', 
-    'rxn1_stp1_unreacted.data_template', 
-    'rxn1_stp1_reacted.data_template', 
-    ['C', 'N', 'H', 'H', 'C', 'O', 'H', 'O', 'N', 'H', 'O']
-)
 correctNylon = {
     '1': ['1'],
     '2': ['2'],
@@ -158,15 +142,8 @@ correctNylon = {
     '17': ['17', '18'],
     '18': ['17', '18'],
 }
-nylon.test_report(correctNylon, 'Nylon Melt Lammps Example')
 
 # Phenol O-Alkylation
-phenAlkyl = Reaction(
-    'Test_Cases/Map_Tests/Phenol_Alkylation', 
-    'pre-molecule.data', 
-    'post-molecule.data', 
-    ['H', 'H', 'C', 'C', 'O', 'O']
-)
 correctPhenAlkyl = {
     '1': ['1'],
     '2': ['2'],
@@ -193,15 +170,8 @@ correctPhenAlkyl = {
     '23': ['21', '22'],
     '24': ['21', '22']
 }
-phenAlkyl.test_report(correctPhenAlkyl, 'Phenol O-Alkylation')
 
 # Symmetric Diol
-symmDiol = Reaction(
-    'Test_Cases/Map_Tests/Symmetric_Diol', 
-    'pre-molecule.data', 
-    'post-molecule.data', 
-    ['H', 'H', 'C', 'C', 'O', 'O']
-)
 correctSymmDiol = {
     '1': ['1'],
     '2': ['15'],
@@ -221,4 +191,18 @@ correctSymmDiol = {
     '16': ['4', '14', '16', '2'],
     '17': ['17']
 }
-symmDiol.test_report(correctSymmDiol, 'Symmetric Diol')
+
+CASES = [
+    ('DGEBA-DETDA', 'Test_Cases/Map_Tests/DGEBA_DETDA/', 'pre-molecule.data', 'post-molecule.data', ['H', 'H', 'C', 'C', 'N', 'O', 'O', 'O'], correctDgebaDetda),
+    ('Ethyl Ethanoate', 'Test_Cases/Map_Tests/Ethyl_Ethanoate', 'pre-molecule.data', 'post-molecule.data', ['H', 'H', 'C', 'C', 'O', 'O', 'O', 'O'], correctEthylEthanoate),
+    ('Methane to Ethane', 'Test_Cases/Map_Tests/Methane_Ethane', 'pre-molecule.data', 'post-molecule.data', ['H', 'C'], correctEthane),
+    ('Nylon Melt Lammps Example', 'Test_Cases/Map_Tests/Lammps_Nylon', 'rxn1_stp1_unreacted.data_template', 'rxn1_stp1_reacted.data_template', ['C', 'N', 'H', 'H', 'C', 'O', 'H', 'O', 'N', 'H', 'O'], correctNylon),
+    ('Phenol O-Alkylation', 'Test_Cases/Map_Tests/Phenol_Alkylation', 'pre-molecule.data', 'post-molecule.data', ['H', 'H', 'C', 'C', 'O', 'O'], correctPhenAlkyl),
+    ('Symmetric Diol', 'Test_Cases/Map_Tests/Symmetric_Diol', 'pre-molecule.data', 'post-molecule.data', ['H', 'H', 'C', 'C', 'O', 'O'], correctSymmDiol),
+]
+
+if __name__ == '__main__':
+    # Reactions are independent so run them across worker processes
+    with ProcessPoolExecutor(max_workers=6) as executor:
+        for report in executor.map(run_case, CASES):
+            print(report)
@@ -22,10 +22,11 @@
 import os
 import logging
 from natsort import natsorted
+from itertools import chain
 from collections import Counter, deque
 
-from LammpsSearchFuncs import get_data, get_top_comments, read_top_comments, find_sections, get_neighbours, get_additional_neighbours, element_atomID_dict
-from LammpsTreatmentFuncs import clean_data, save_text_file
+from LammpsSearchFuncs import get_data, get_top_comments, read_top_comments, get_neighbours, get_additional_neighbours, element_atomID_dict, load_cleaned_file
+from LammpsTreatmentFuncs import save_text_file
 
 # Classes and functions for search
 class Queue:
@@ -131,7 +132,7 @@ class Atom():
         self.mappedNeighbourElements = [elementDict[atomID]for atomID in self.mappedNeighbourIDs]
 
 
-    def map_elements(self, atomObject, preAtomObjectList, postAtomObjectList):
+    def map_elements(self, atomObject, preAtomObjectDict, postAtomObjectDict):
         # Output variables
         mapList = []
         missingPreAtoms = []
@@ -202,13 +203,11 @@ class Atom():
                     # Get neighbour post atoms objects
                     postNeighbourIndices = [index for index, val in enumerate(atomObject.mappedNeighbourElements) if val == neighbour]
                     postNeighbourAtomIDs = [atomObject.mappedNeighbourIDs[i] for i in postNeighbourIndices]
-                    postNeighbourAtomObjects = [postAtomObject for postAtomObject in postAtomObjectList if postAtomObject.atomID in postNeighbourAtomIDs]
+                    # Sort by atomID so comparison order matches the original object list order
+                    postNeighbourAtomObjects = [postAtomObjectDict[atomID] for atomID in sorted(postNeighbourAtomIDs, key=int)]
 
                     # Get possible pre atom object
-                    preNeighbourAtomObject = 0
-                    for preAtomObject in preAtomObjectList:
-                        if preAtomObject.atomID == self.mappedNeighbourIDs[preIndex]:
-                            preNeighbourAtomObject = preAtomObject
+                    preNeighbourAtomObject = preAtomObjectDict[self.mappedNeighbourIDs[preIndex]]
 
                     # Find the post atom ID for the current pre atom
                     postNeighbourAtomID = compare_symmetric_atoms(postNeighbourAtomObjects, preNeighbourAtomObject, 'atomID')
@@ -228,13 +227,11 @@ class Atom():
         return mapList, missingPreAtoms, missingPostAtoms, queueAtoms
 
 def build_atom_objects(fileName, elementDict):
-    # Load molecule file
-    with open(fileName, 'r') as f:
-        lines = f.readlines()
+    # Read molecule file through the cached loader - skips the reparse after element_atomID_dict
+    rawText, data, sections = load_cleaned_file(fileName)
+    lines = rawText.splitlines()
 
-    # Clean data and get coords and bonds
-    data = clean_data(lines)
-    sections = find_sections(data)
+    # Get coords and bonds
     coords = get_data('Coords', data, sections)
 
     atomIDs = [row[0] for row in coords]
@@ -260,7 +257,7 @@ def build_atom_objects(fileName, elementDict):
     def get_elements(neighbourIDs, elementDict):
         return [elementDict[atomID]for atomID in neighbourIDs]
 
-    atomObjectList = []
+    atomObjectDict = {}
     for atomID in atomIDs:
         neighbours = neighboursDict[atomID]
         secondNeighbours = get_additional_neighbours(neighboursDict, atomID, neighbours)
@@ -284,45 +281,43 @@ def build_atom_objects(fileName, elementDict):
             edgeAtom = None
 
         atom = Atom(atomID, elementDict[atomID], bondingAtom, edgeAtom, neighbours, secondNeighbours, thirdNeighbours, neighbourElements, secondNeighbourElements, thirdNeighbourElements)
-        atomObjectList.append(atom)
-    
-    return atomObjectList, bondingAtoms, edgeAtomDict, deleteAtoms
+        atomObjectDict[atomID] = atom
+
+    return atomObjectDict, bondingAtoms, edgeAtomDict, deleteAtoms
 
 # Returns atom class object that has specific atom ID
-def get_atom_object(atomID, atomList):
+def get_atom_object(atomID, atomDict):
     '''
     Returns the atom object for a specific atom ID. Potential uses include turning queue
     atom IDs into atom objects for next stage of queue processing.
     Args:
         atomID: A string integer atom ID
-        atomList: List of all possible atom objects, either pre- or post-bond
+        atomDict: Dict of all possible atom objects keyed by atomID, either pre- or post-bond
 
     Returns:
         Atom object
     '''
-    for atom in atomList:
-        if atom.atomID == atomID:
-            return atom
+    return atomDict.get(atomID)
 
-def add_to_queue(queue, queueAtoms, preAtomObjectList, postAtomObjectList):
+def add_to_queue(queue, queueAtoms, preAtomObjectDict, postAtomObjectDict):
     queueAtomObjects = []
     for pair in queueAtoms:
-        preAtom = get_atom_object(pair[0], preAtomObjectList)
-        postAtom = get_atom_object(pair[1], postAtomObjectList)
+        preAtom = get_atom_object(pair[0], preAtomObjectDict)
+        postAtom = get_atom_object(pair[1], postAtomObjectDict)
         queueAtomObjects.append([preAtom, postAtom])
     queue.add(queueAtomObjects)
 
-def queue_bond_atoms(preAtomObjectList, preBondingAtoms, postAtomObjectList, postBondingAtoms, mappedIDList, queue):
+def queue_bond_atoms(preAtomObjectDict, preBondingAtoms, postAtomObjectDict, postBondingAtoms, mappedIDList, queue):
     # Loop through bonding atoms, getting atom objects and adding them to queue and mapped list
     for index, preBondAtom in enumerate(preBondingAtoms):
-        preAtomObject = get_atom_object(preBondAtom, preAtomObjectList)
-        postAtomObject = get_atom_object(postBondingAtoms[index], postAtomObjectList)
+        preAtomObject = get_atom_object(preBondAtom, preAtomObjectDict)
+        postAtomObject = get_atom_object(postBondingAtoms[index], postAtomObjectDict)
         queue.add([[preAtomObject, postAtomObject]])
         mappedIDList.append([preBondAtom, postBondingAtoms[index]])
         logging.debug(f'Pre: {preBondAtom}, Post: {postBondingAtoms[index]} found with user specified bond atom')
 
 
-def queue_edge_atoms(preAtomObjectList, preEdgeAtomDict, postAtomObjectList, postEdgeAtomDict, mappedIDList, queue):
+def queue_edge_atoms(preAtomObjectDict, preEdgeAtomDict, postAtomObjectDict, postEdgeAtomDict, mappedIDList, queue):
     # Skip function call if no edge atoms present
     if preEdgeAtomDict is None:
         return
@@ -338,8 +333,8 @@ def queue_edge_atoms(preAtomObjectList, preEdgeAtomDict, postAtomObjectList, pos
         preEdgeAtomID = list(preEdgeAtomDict.keys())[list(preEdgeAtomDict.values()).index(fingerprint)]
         postEdgeAtomID = list(postEdgeAtomDict.keys())[list(postEdgeAtomDict.values()).index(fingerprint)]
         
-        preAtomObject = get_atom_object(preEdgeAtomID, preAtomObjectList)
-        postAtomObject = get_atom_object(postEdgeAtomID, postAtomObjectList)
+        preAtomObject = get_atom_object(preEdgeAtomID, preAtomObjectDict)
+        postAtomObject = get_atom_object(postEdgeAtomID, postAtomObjectDict)
         
         queue.add([[preAtomObject, postAtomObject]])
         mappedIDList.append([preEdgeAtomID, postEdgeAtomID])
@@ -354,16 +349,16 @@ def map_delete_atoms(preDeleteAtoms, postDeleteAtoms, mappedIDList):
             mappedIDList.append([preAtom, postDeleteAtoms[index]])
             logging.debug(f'Pre: {preAtom}, Post: {postDeleteAtoms[index]} found with specified delete atom')
 
-def run_queue(queue, mappedIDList, preAtomObjectList, postAtomObjectList, missingPreAtomList, missingPostAtomList, elementDictList):
+def run_queue(queue, mappedIDList, preAtomObjectDict, postAtomObjectDict, missingPreAtomList, missingPostAtomList, elementDictList):
     while not queue.empty():
         currentAtoms = queue.get()
         for mainIndex, atom in enumerate(currentAtoms):
             atom.check_mapped(mappedIDList, mainIndex, elementDictList[mainIndex])
         
-        newMap, missingPreAtoms, missingPostAtoms, queueAtoms = currentAtoms[0].map_elements(currentAtoms[1], preAtomObjectList, postAtomObjectList)
+        newMap, missingPreAtoms, missingPostAtoms, queueAtoms = currentAtoms[0].map_elements(currentAtoms[1], preAtomObjectDict, postAtomObjectDict)
 
         # Convert queue atoms to atom class objects and add to queue
-        add_to_queue(queue, queueAtoms, preAtomObjectList, postAtomObjectList)
+        add_to_queue(queue, queueAtoms, preAtomObjectDict, postAtomObjectDict)
 
         # Extend missing lists
         missingPreAtomList.extend(missingPreAtoms)
@@ -372,10 +367,10 @@ def run_queue(queue, mappedIDList, preAtomObjectList, postAtomObjectList, missin
         # Add new pairs to mapped ID list
         mappedIDList.extend(newMap)
 
-def get_missing_atom_objects(missingAtomList, atomObjectList):
+def get_missing_atom_objects(missingAtomList, atomObjectDict):
     missingAtomObjects = []
     for atom in missingAtomList:
-        atomObject = get_atom_object(atom, atomObjectList)
+        atomObject = get_atom_object(atom, atomObjectDict)
         missingAtomObjects.append(atomObject)
 
     return missingAtomObjects
@@ -468,12 +463,9 @@ def output_path(mappedIDList, preBondingAtoms, preEdgeAtomDict, preDeleteAtoms):
     for atomPair in mappedIDList:
         equivalenceAtoms.extend([[atomPair[0] + '\t' + atomPair[1]]])
 
-    # Output data
-    output = []
+    # Output data combined in a single flattening pass
     totalOutput = [equivalences, deleteIDCount, edgeIDCount, bondingAtoms, deleteAtoms, edgeAtoms, equivalenceAtoms]
-
-    for section in totalOutput:
-        output.extend(section)
+    output = list(chain.from_iterable(totalOutput))
 
     return output
 
@@ -484,15 +476,18 @@ def map_from_path(directory, preFileName, postFileName, elementsByType, debug):
     else:
         logging.basicConfig(level='INFO')
 
+    # Build file paths - no chdir side effect so reactions can run in parallel
+    preFilePath = os.path.join(directory, preFileName)
+    postFilePath = os.path.join(directory, postFileName)
+
     # Build atomID to element dict
-    os.chdir(directory)
-    preElementDict = element_atomID_dict(preFileName, elementsByType)
-    postElementDict = element_atomID_dict(postFileName, elementsByType)
+    preElementDict = element_atomID_dict(preFilePath, elementsByType)
+    postElementDict = element_atomID_dict(postFilePath, elementsByType)
     elementDictList = [preElementDict, postElementDict]
 
-    # Generate atom class objects list
-    preAtomObjectList, preBondingAtoms, preEdgeAtomDict, preDeleteAtoms = build_atom_objects(preFileName, preElementDict)
-    postAtomObjectList, postBondingAtoms, postEdgeAtomDict, postDeleteAtoms = build_atom_objects(postFileName, postElementDict)
+    # Generate atom class objects dict, keyed by atomID for constant time lookup
+    preAtomObjectDict, preBondingAtoms, preEdgeAtomDict, preDeleteAtoms = build_atom_objects(preFilePath, preElementDict)
+    postAtomObjectDict, postBondingAtoms, postEdgeAtomDict, postDeleteAtoms = build_atom_objects(postFilePath, postElementDict)
 
     # Initialise lists
     mappedIDList = []
@@ -503,16 +498,16 @@ def map_from_path(directory, preFileName, postFileName, elementsByType, debug):
     queue = Queue()
 
     # Populate queue with bonding atoms and update mappedIDList
-    queue_bond_atoms(preAtomObjectList, preBondingAtoms, postAtomObjectList, postBondingAtoms, mappedIDList, queue)
+    queue_bond_atoms(preAtomObjectDict, preBondingAtoms, postAtomObjectDict, postBondingAtoms, mappedIDList, queue)
 
     # Populate queue with unique edge atoms if present
-    queue_edge_atoms(preAtomObjectList, preEdgeAtomDict, postAtomObjectList, postEdgeAtomDict, mappedIDList, queue)
+    queue_edge_atoms(preAtomObjectDict, preEdgeAtomDict, postAtomObjectDict, postEdgeAtomDict, mappedIDList, queue)
 
     # Add delete atoms to the mappedIDList
     map_delete_atoms(preDeleteAtoms, postDeleteAtoms, mappedIDList)
 
     # Search through queue creating new maps based on all elements in a given path
-    run_queue(queue, mappedIDList, preAtomObjectList, postAtomObjectList, missingPreAtomList, missingPostAtomList, elementDictList)
+    run_queue(queue, mappedIDList, preAtomObjectDict, postAtomObjectDict, missingPreAtomList, missingPostAtomList, elementDictList)
 
     # Update missingPreAtoms to check if the missing atom search loop is needed
     missingPreAtomList = update_missing_list(missingPreAtomList, mappedIDList, 0)
@@ -525,16 +520,15 @@ def map_from_path(directory, preFileName, postFileName, elementsByType, debug):
         missingPostAtomList = update_missing_list(missingPostAtomList, mappedIDList, 1)
 
         # Get pre atom objects
-        missingPreAtomObjects = get_missing_atom_objects(missingPreAtomList, preAtomObjectList)
+        missingPreAtomObjects = get_missing_atom_objects(missingPreAtomList, preAtomObjectDict)
 
         # Add any post atoms that aren't in the map or already in the missing atoms
         mappedPostAtoms = [pair[1] for pair in mappedIDList]
-        totalPostAtomList = [postAtom.atomID for postAtom in postAtomObjectList]
-        unfoundMissingPostAtoms = [atomID for atomID in totalPostAtomList if atomID not in mappedPostAtoms and atomID not in missingPostAtomList]
+        unfoundMissingPostAtoms = [atomID for atomID in postAtomObjectDict if atomID not in mappedPostAtoms and atomID not in missingPostAtomList]
         missingPostAtomList.extend(unfoundMissingPostAtoms)
 
         # Get post atom objects
-        missingPostAtomObjects = get_missing_atom_objects(missingPostAtomList, postAtomObjectList)
+        missingPostAtomObjects = get_missing_atom_objects(missingPostAtomList, postAtomObjectDict)
 
         map_missing_atoms(missingPreAtomObjects, missingPostAtomObjects, mappedIDList, queue)
 
@@ -543,7 +537,7 @@ def map_from_path(directory, preFileName, postFileName, elementsByType, debug):
         missingPostAtomList = update_missing_list(missingPostAtomList, mappedIDList, 1)
 
         # Rerun the queue based on atom pairs added to queue from missingAtoms
-        run_queue(queue, mappedIDList, preAtomObjectList, postAtomObjectList, missingPreAtomList, missingPostAtomList, elementDictList)
+        run_queue(queue, mappedIDList, preAtomObjectDict, postAtomObjectDict, missingPreAtomList, missingPostAtomList, elementDictList)
         logging.debug(f'missingPreAtoms after loop {timeoutCounter}: {missingPreAtomList}') 
 
         timeoutCounter += 1
@@ -552,7 +546,7 @@ def map_from_path(directory, preFileName, postFileName, elementsByType, debug):
     mappedIDList = natsorted(mappedIDList, key=lambda x: x[0])
 
     outputData = output_path(mappedIDList, preBondingAtoms, preEdgeAtomDict, preDeleteAtoms)
-    save_text_file('automap.data', outputData)
+    save_text_file(os.path.join(directory, 'automap.data'), outputData)
 
     return mappedIDList
 
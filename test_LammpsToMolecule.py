@@ -6,7 +6,7 @@ from LammpsSearchFuncs import get_data, find_sections
 def test_lammps_to_molecule():
     path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Test_Cases/Methane_Ethane') # Allows for relative pathing in pytest
     lammps_to_molecule(path, 'cleanedpre_reaction.data', 'pre-', ['1', '6'])
-    with open ('pre-molecule.data', 'r') as f:
+    with open (os.path.join(path, 'pre-molecule.data'), 'r') as f:
         mol = f.readlines()
     
     mol = clean_data(mol)
@@ -7,7 +7,7 @@ def test_lammps_to_molecule_partial():
     path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Test_Cases/DGEBA_DETDA') # Allows for relative pathing in pytest
     lammps_to_molecule_partial(path, 'cleanedpost_rx1.data', 'post_rx1_', ['H', 'H', 'C', 'C', 'N', 'O', 'O', 'O'], ['32', '15'])
 
-    with open ('post_rx1_molecule.data', 'r') as f:
+    with open (os.path.join(path, 'post_rx1_molecule.data'), 'r') as f:
         mol = f.readlines()
     
     edgeAtoms = get_top_comments(mol)[1][1:]
@@ -8,7 +8,7 @@ def test_unified_cleaner():
     file_unifier(path, 'system.in.settings', ['pre-system.data', 'post-system.data'])
 
     # Load cleaned pre-system
-    with open('cleanedpre-system.data', 'r') as f:
+    with open(os.path.join(path, 'cleanedpre-system.data'), 'r') as f:
         data = f.readlines()
 
     data = clean_data(data)
@@ -17,7 +17,7 @@ def test_unified_cleaner():
     matchAtomsCount = int(data[1].split()[0]) == len(atoms)
 
     # Load cleaned settings
-    with open('cleanedsystem.in.settings', 'r') as f:
+    with open(os.path.join(path, 'cleanedsystem.in.settings'), 'r') as f:
         settings = f.readlines()
 
     # Number of coeffs, number of sections (+1 for end of file), last section name, number of bond coeffs, number of atoms in header and number in Atoms section